@@ -1,5 +1,14 @@
 from cocotb.types import LogicArray, Range
-from typing import List, Set
+from typing import Dict, FrozenSet, Optional
+
+# Initial RAM values specified in the Arista Interview Assignment, keyed by address.
+_INITIAL_VALUES: Dict[int, int] = {
+    0: 0x01234567,
+    1: 0x89abcde7,
+    2: 0x0a0b0c0d,
+    3: 0x10203040,
+    231: 0xdeadbeef,
+}
 
 
 class MemoryModel:
@@ -10,8 +19,12 @@ class MemoryModel:
         assert addr_w > 0, f"Address width must be greater than 0. Got: {addr_w}"
         self.data_w: int = data_w
         self.addr_w: int = addr_w
-        self.ram: List[LogicArray] = self.__generate_initial_ram()
-        self.valid_addrs: Set[int] = {0, 1, 2, 3, 231}
+        self._ram_size: int = 2**self.addr_w
+        self._data_max: int = 2**self.data_w - 1
+        self._data_range: Range = Range(self.data_w - 1, "downto", 0)
+        self.valid_addrs: FrozenSet[int] = frozenset(_INITIAL_VALUES)
+        self.ram: Dict[int, int] = self.__generate_initial_ram()
+        self._read_cache: Dict[int, LogicArray] = {}
 
     def write(self, addr: int, wr_data: int) -> None:
         """Write data into the specified address. Write is only successful if the address
@@ -21,16 +34,16 @@ class MemoryModel:
             addr (int): Address of RAM to write to.
             wr_data (int): Data to write into RAM.
         """
-        assert addr >= 0 and addr < len(self.ram), f"Address out of range (0 to {len(self.ram)}). Got: {addr}"
-        assert (
-            wr_data >= 0 and wr_data < 2**self.data_w - 1
-        ), f"Write data out of range ({0} to {2**self.data_w-1}). Got: {wr_data}"
+        assert 0 <= addr < self._ram_size, f"Address out of range (0 to {self._ram_size}). Got: {addr}"
+        assert 0 <= wr_data <= self._data_max, f"Write data out of range (0 to {self._data_max}). Got: {wr_data}"
         if addr in self.valid_addrs:
-            self.ram[addr] = LogicArray(wr_data, Range(self.data_w - 1, "downto", 0))
+            self.ram[addr] = wr_data
+            self._read_cache.pop(addr, None)
 
     def read(self, addr: int) -> LogicArray:
         """Read data from the specified address. Read is only successful if the address
-        is a valid address
+        is a valid address. The returned LogicArray is cached until the address is next
+        written, so it must not be modified by the caller.
 
         Args:
             addr (int): Address of RAM to read from.
@@ -38,32 +51,37 @@ class MemoryModel:
         Returns:
             LogicArray: Data stored in RAM at address
         """
-        assert addr >= 0 and addr < len(self.ram), f"Address out of range (0 to {len(self.ram)}). Got: {addr}"
+        rd_int = self.read_int(addr)
+        if rd_int is None:
+            return None
+        rd_data = self._read_cache.get(addr)
+        if rd_data is None:
+            rd_data = LogicArray(rd_int, self._data_range)
+            self._read_cache[addr] = rd_data
+        return rd_data
+
+    def read_int(self, addr: int) -> Optional[int]:
+        """Read data from the specified address as an unsigned integer. Read is only
+        successful if the address is a valid address.
+
+        Args:
+            addr (int): Address of RAM to read from.
+
+        Returns:
+            Optional[int]: Data stored in RAM at address, or None if the address is invalid
+        """
+        assert 0 <= addr < self._ram_size, f"Address out of range (0 to {self._ram_size}). Got: {addr}"
         if addr in self.valid_addrs:
             return self.ram[addr]
         else:
             return None
 
-    def __generate_initial_ram(self) -> List[LogicArray]:
-        """Return the initial RAM values. Each RAM element is a LogicArray with values
-        specified in the Arista Interview Assignment.
+    def __generate_initial_ram(self) -> Dict[int, int]:
+        """Return the initial RAM values specified in the Arista Interview Assignment.
+        Only the valid addresses are stored, as plain integers. Every other address
+        cannot be written to or read from, so it is never allocated.
 
         Returns:
-            List[LogicArray]: Initial RAM values
+            Dict[int, int]: Initial RAM values, keyed by address
         """
-        init_ram: List[int] = []
-        for idx in range(2**self.addr_w):
-            if idx == 0:
-                init_ram.append(LogicArray(int("0x01234567", 16), Range(self.data_w - 1, "downto", 0)))
-            elif idx == 1:
-                init_ram.append(LogicArray(int("0x89abcde7", 16), Range(self.data_w - 1, "downto", 0)))
-            elif idx == 2:
-                init_ram.append(LogicArray(int("0x0a0b0c0d", 16), Range(self.data_w - 1, "downto", 0)))
-            elif idx == 3:
-                init_ram.append(LogicArray(int("0x10203040", 16), Range(self.data_w - 1, "downto", 0)))
-            elif idx == 231:
-                init_ram.append(LogicArray(int("0xdeadbeef", 16), Range(self.data_w - 1, "downto", 0)))
-            else:
-                init_ram.append(0)
-
-        return init_ram
+        return dict(_INITIAL_VALUES)
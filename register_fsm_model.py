@@ -1,14 +1,11 @@
-import cocotb
-from cocotb.types import LogicArray, Range
-from typing import List, Set, Tuple
-from enum import Enum
-import math
+from typing import List, Optional, Sequence, Tuple
+from enum import IntEnum
 import random
 
 from memory_model import MemoryModel
 
 
-class CommandBytes(Enum):
+class CommandBytes(IntEnum):
     """Enum for command bytes as described in the Arista Interview Assignment."""
 
     NULL = 0
@@ -19,17 +16,82 @@ class CommandBytes(Enum):
     ESCAPE = 231
 
 
+# Command byte values bound once, for use on hot paths instead of CommandBytes.X.value.
+_NULL = CommandBytes.NULL.value
+_READ = CommandBytes.READ.value
+_WRITE = CommandBytes.WRITE.value
+_READ_DATA = CommandBytes.READ_DATA.value
+_BREAK = CommandBytes.BREAK.value
+_ESCAPE = CommandBytes.ESCAPE.value
+
+# Single byte BREAK response, ESCAPE as a single byte, and escaped (doubled) for use in
+# read data.
+_BREAK_BYTES = _BREAK.to_bytes(1, "big")
+_ESCAPE_BYTES = _ESCAPE.to_bytes(1, "big")
+_ESCAPED_ESCAPE_BYTES = _ESCAPE_BYTES * 2
+
+# Byte lookup table, non-zero at the index of the ESCAPE byte.
+_IS_ESCAPE = bytes(byte == _ESCAPE for byte in range(256))
+
+# Actions taken by the parser on the byte following an ESCAPE byte, indexed by that byte.
+_ESCAPED_IGNORE = 0
+_ESCAPED_LITERAL = 1
+_ESCAPED_COMMAND = 2
+_ESCAPED_BREAK = 3
+_ESCAPED_ACTIONS = bytes(
+    {
+        _ESCAPE: _ESCAPED_LITERAL,
+        _WRITE: _ESCAPED_COMMAND,
+        _READ: _ESCAPED_COMMAND,
+        _BREAK: _ESCAPED_BREAK,
+    }.get(byte, _ESCAPED_IGNORE)
+    for byte in range(256)
+)
+
+
+class _RandomPool:
+    """Draws random elements from a fixed population. Draws are served from a buffer
+    of samples taken in bulk with the generator's choices method, which is refilled
+    once exhausted."""
+
+    def __init__(self, rng: random.Random, population: Sequence[int], batch_size: int = 1024):
+        self.population = population
+        self.batch_size = batch_size
+        self._choices = rng.choices
+        self._samples: List[int] = []
+
+    def draw(self) -> int:
+        """Return a random element of the population."""
+        if not self._samples:
+            self._samples = self._choices(self.population, k=self.batch_size)
+        return self._samples.pop()
+
+
 class RegisterFsmModel:
     """Models the behaviour of the register FSM described in the Arista Interview Assignment.
     Also used to generate command bytestreams."""
 
-    def __init__(self, num_cmds: int, data_w: int, addr_w: int):
+    def __init__(self, num_cmds: int, data_w: int, addr_w: int, seed: Optional[int] = None):
         assert num_cmds > 0, (
             f"Number of commands must be greater than 0. Got {num_cmds}."
         )
+        # Seed from the global generator by default so cocotb's RANDOM_SEED still
+        # reproduces a test run.
+        if seed is None:
+            seed = random.getrandbits(64)
+        self._rng = random.Random(seed)
         self.data_w = data_w
         self.addr_w = addr_w
         self.byte_w = 8
+        self._num_addr_bytes = -(-self.addr_w // self.byte_w)
+        self._num_data_bytes = -(-self.data_w // self.byte_w)
+        self._addr_mask = 2**self.addr_w - 1
+        # Commands always carry a 4 byte address; write commands are followed by data
+        self._num_cmd_addr_bytes = 4
+        self._num_cmd_bytes = {
+            _READ: self._num_cmd_addr_bytes,
+            _WRITE: self._num_cmd_addr_bytes + self._num_data_bytes,
+        }
         self.mem_model = MemoryModel(self.data_w, self.addr_w)
         command_bytes = [
             CommandBytes.READ,
@@ -37,14 +99,24 @@ class RegisterFsmModel:
             CommandBytes.BREAK,
             CommandBytes.ESCAPE,
         ]
-        self._command_values = [command.value for command in command_bytes]
+        self._command_values: Tuple[int, ...] = tuple(command.value for command in command_bytes)
+        # Four command values, so a uniform index is drawn with getrandbits(2)
+        assert len(self._command_values) == 4
+        self._getrandbits = self._rng.getrandbits
+        self._choice_addrs_lsb: Tuple[int, ...] = (
+            tuple(self.mem_model.valid_addrs) + (42,) + self._command_values
+        )
+        self._command_types: Tuple[int, ...] = self._command_values + (_NULL,)
+        self._command_types_pool = _RandomPool(self._rng, self._command_types)
+        self._addrs_lsb_pool = _RandomPool(self._rng, self._choice_addrs_lsb)
 
-        self.command_bytestreams: List[List[int]] = []
-        self.read_bytestreams: List[List[int]] = []
+        self.command_bytestreams: List[bytearray] = []
+        self.read_bytestreams: List[bytearray] = []
         self.update_bytestreams(num_cmds)
 
-    def __generate_random_address_bytes(self) -> Tuple[List[int], bool]:
-        """For a write/read commands, generate random address bytes.
+    def __generate_random_address_bytes(self, command_bytes: bytearray) -> Optional[int]:
+        """For a write/read commands, generate random address bytes and append them to
+        the command bytes.
 
         The generation of address bytes is constrained. Address MSB
         is either a 0 or an ESCAPE byte. Zeros for MSB can be padded
@@ -57,128 +129,75 @@ class RegisterFsmModel:
 
         If the address MSB or LSB is an ESCAPE byte, the generation of the address
         LSB must be either a READ, WRITE, BREAK, ESCAPE byte.
+
+        Args:
+            command_bytes (bytearray): Command bytes to append the address bytes to.
+
+        Returns:
+            Optional[int]: Command value that interrupted the address, otherwise None.
         """
-        num_bytes = math.ceil(self.addr_w / self.byte_w)
-        addr_bytes: List[int] = [0, 0]
-        is_escaped = False
-        interrupt_cmd = False
-        byte_idx = 0
-        while byte_idx < num_bytes:
+        command_bytes.extend((0, 0))
+        for byte_idx in range(self._num_addr_bytes):
             if byte_idx == 0:
-                if not is_escaped:
-                    choice_addrs_msb = [0, CommandBytes.ESCAPE.value]
-                    addr_byte = random.choice(choice_addrs_msb)
-                    addr_bytes.append(addr_byte)
-                    if addr_byte == CommandBytes.ESCAPE.value:
-                        is_escaped = True
-                    else:
-                        byte_idx += 1
-                if is_escaped:
-                    addr_byte = random.choice(self._command_values)
-                    is_escaped = False
-                    addr_bytes.append(addr_byte)
-                    byte_idx += 1
-                    if addr_byte != CommandBytes.ESCAPE.value:
-                        addr_bytes.extend(self.__generate_command_bytes(addr_byte))
-                        byte_idx = num_bytes
-                        interrupt_cmd = True
+                addr_byte = _ESCAPE if self._getrandbits(1) else 0
             else:
-                if not is_escaped:
-                    choice_addrs_lsb: List[int] = list(self.mem_model.valid_addrs)
-                    choice_addrs_lsb.append(42)
-                    choice_addrs_lsb.extend(self._command_values)
-                    addr_byte = random.choice(choice_addrs_lsb)
-                    addr_bytes.append(addr_byte)
-                    if addr_byte == CommandBytes.ESCAPE.value:
-                        is_escaped = True
-                    else:
-                        byte_idx += 1
-                elif is_escaped:
-                    addr_byte = random.choice(self._command_values)
-                    is_escaped = False
-                    addr_bytes.append(addr_byte)
-                    byte_idx += 1
-                    if addr_byte != CommandBytes.ESCAPE.value:
-                        addr_bytes.extend(self.__generate_command_bytes(addr_byte))
-                        byte_idx = num_bytes
-                        interrupt_cmd = True
+                addr_byte = self._addrs_lsb_pool.draw()
+            command_bytes.append(addr_byte)
+            if _IS_ESCAPE[addr_byte]:
+                addr_byte = self._command_values[self._getrandbits(2)]
+                command_bytes.append(addr_byte)
+                if not _IS_ESCAPE[addr_byte]:
+                    return addr_byte
 
-        return tuple([addr_bytes, interrupt_cmd])
+        return None
 
-    def __generate_random_data_bytes(self) -> List[int]:
-        """For a write command, generate random data bytes.
+    def __generate_random_data_bytes(self, command_bytes: bytearray) -> Optional[int]:
+        """For a write command, generate random data bytes and append them to the
+        command bytes.
 
         Data bytes can be any number from 0 to 2**BYTE_WIDTH-1.
         If a data byte generated is an ESCAPE byte, the subsequent byte must
         be either a READ, WRITE, BREAK, ESCAPE byte.
+
+        Args:
+            command_bytes (bytearray): Command bytes to append the data bytes to.
+
+        Returns:
+            Optional[int]: Command value that interrupted the data, otherwise None.
         """
-        num_bytes = math.ceil(self.data_w / self.byte_w)
-        data_bytes: List[int] = []
-        is_escaped = False
-        byte_idx = 0
-        while byte_idx < num_bytes:
-            if byte_idx == 0:
-                if not is_escaped:
-                    data_byte = random.randint(0, 2**self.byte_w - 1)
-                    data_bytes.append(data_byte)
-                    if data_byte == CommandBytes.ESCAPE.value:
-                        is_escaped = True
-                    else:
-                        byte_idx += 1
-                elif is_escaped:
-                    data_byte = random.choice(self._command_values)
-                    is_escaped = False
-                    data_bytes.append(data_byte)
-                    if data_byte == CommandBytes.ESCAPE.value:
-                        byte_idx += 1
-                    else:
-                        data_bytes.extend(self.__generate_command_bytes(data_byte))
-                        byte_idx = num_bytes
-            else:
-                if not is_escaped:
-                    data_byte = random.randint(0, 2**self.byte_w - 1)
-                    data_bytes.append(data_byte)
-                    if data_byte == CommandBytes.ESCAPE.value:
-                        is_escaped = True
-                    else:
-                        byte_idx += 1
-                elif is_escaped:
-                    data_byte = random.choice(self._command_values)
-                    is_escaped = False
-                    data_bytes.append(data_byte)
-                    if data_byte == CommandBytes.ESCAPE.value:
-                        byte_idx += 1
-                    else:
-                        data_bytes.extend(self.__generate_command_bytes(data_byte))
-                        byte_idx = num_bytes
+        for _ in range(self._num_data_bytes):
+            data_byte = self._getrandbits(self.byte_w)
+            command_bytes.append(data_byte)
+            if _IS_ESCAPE[data_byte]:
+                data_byte = self._command_values[self._getrandbits(2)]
+                command_bytes.append(data_byte)
+                if not _IS_ESCAPE[data_byte]:
+                    return data_byte
 
-        return data_bytes
+        return None
 
-    def __generate_command_bytes(self, command_value: int) -> List[int]:
-        """Generate command bytes for the corresponding command value.
-        Requirements for how the bytes should be generated can be found in
-        the Arista Interview Assignment document.
+    def __generate_command_bytes(self, command_value: int, command_bytes: bytearray) -> None:
+        """Generate command bytes for the corresponding command value and append them
+        to the command bytes. Requirements for how the bytes should be generated can be
+        found in the Arista Interview Assignment document.
+
+        A command interrupted by an escaped command byte is never resumed, so the
+        interrupting command is generated next in the same loop instead of recursing.
 
         Args:
             command_value (int): Command byte value.
-
-        Returns:
-            List[int]: List of generated bytes.
+            command_bytes (bytearray): Command bytes to append the generated bytes to.
         """
-        command_bytes: List[int] = []
-        if command_value == CommandBytes.READ.value:
-            command_byte, _ = self.__generate_random_address_bytes()
-            command_bytes.extend(command_byte)
-        elif command_value == CommandBytes.WRITE.value:
-            command_byte, interrupt_cmd = self.__generate_random_address_bytes()
-            command_bytes.extend(command_byte)
-            if not interrupt_cmd:
-                command_bytes.extend(self.__generate_random_data_bytes())
-        elif command_value == CommandBytes.BREAK.value:
-            return []
-        elif command_value == CommandBytes.ESCAPE.value:
-            return []
-        return command_bytes
+        next_command: Optional[int] = command_value
+        while next_command is not None:
+            if next_command == _READ:
+                next_command = self.__generate_random_address_bytes(command_bytes)
+            elif next_command == _WRITE:
+                next_command = self.__generate_random_address_bytes(command_bytes)
+                if next_command is None:
+                    next_command = self.__generate_random_data_bytes(command_bytes)
+            else:
+                next_command = None
 
     def __update_command_bytestreams(self, num_cmds: int) -> None:
         """Update the command bytestreams by generating new commands.
@@ -186,246 +205,123 @@ class RegisterFsmModel:
         Args:
             num_cmds (int): Number of command bytestreams to generate.
         """
-        command_bytestreams: List[List[int]] = []
-        for idx in range(num_cmds):
-            command_bytestreams.append([CommandBytes.ESCAPE.value])
-            choices = list(self._command_values)
-            choices.append(0)
-            bytestream_complete = False
-            while not bytestream_complete:
-                command_type = random.choice(choices)
-                if command_type == 0:
-                    command_bytestreams[idx].append(command_type)
-                else:
-                    command_bytestreams[idx].append(command_type)
-                    command_bytestreams[idx].extend(
-                        self.__generate_command_bytes(command_type)
-                    )
-                    bytestream_complete = True
+        command_bytestreams: List[bytearray] = []
+        draw_command_type = self._command_types_pool.draw
+        for _ in range(num_cmds):
+            command_bytestream = bytearray((_ESCAPE,))
+            command_type = draw_command_type()
+            while command_type == _NULL:
+                command_bytestream.append(command_type)
+                command_type = draw_command_type()
+            command_bytestream.append(command_type)
+            self.__generate_command_bytes(command_type, command_bytestream)
+            command_bytestreams.append(command_bytestream)
 
         self.command_bytestreams = command_bytestreams
 
-    def __parse_write_bytestream(self, wr_bytestream: List[int]) -> List[int]:
-        """Parse a write command bytestream to write to Memory Model (RAM). RAM
-        data changes on a successful write.
+    def __parse_command_bytestream(
+        self, bytestream: Sequence[int], pos: int, command: int
+    ) -> Optional[bytes]:
+        """Parse a write or read command bytestream. RAM data changes on a successful
+        write. Returns the read response bytestream if a read is completed.
+
+        An escaped WRITE or READ byte abandons the current command and starts parsing
+        the new command from the next byte. An escaped BREAK byte abandons the current
+        command. Both are handled in place, without slicing the bytestream or recursing.
 
         Args:
-            wr_bytestream (List[int]): List of write command bytes,
+            bytestream (Sequence[int]): Command bytestream.
+            pos (int): Index of the first byte after the command byte.
+            command (int): Command byte value, either WRITE or READ.
 
         Returns:
-            List[int]: Read response bytestream, if the write command was interrupted.
+            Optional[bytes]: Read response bytestream, if a read command was parsed.
         """
-        addr_bytes = []
-        data_bytes = []
-        num_addr_bytes = 4
-        num_data_bytes = math.ceil(self.data_w / self.byte_w)
+        num_addr_bytes = self._num_cmd_addr_bytes
+        num_cmd_bytes = self._num_cmd_bytes[command]
+        cmd_bytes = bytearray(self._num_cmd_bytes[_WRITE])
+        num_parsed = 0
         is_escaped = False
-        for idx, byte in enumerate(wr_bytestream):
-            if len(addr_bytes) < num_addr_bytes:
-                if len(addr_bytes) == 0:
-                    if not is_escaped:
-                        if byte == CommandBytes.ESCAPE.value:
-                            is_escaped = True
-                        else:
-                            addr_bytes.append(byte)
-                    elif is_escaped:
-                        if byte == CommandBytes.BREAK.value:
-                            return None
-                        elif byte == CommandBytes.WRITE.value:
-                            return self.__parse_write_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.READ.value:
-                            return self.__parse_read_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.ESCAPE.value:
-                            addr_bytes.append(byte)
-                            is_escaped = False
-                else:
-                    if not is_escaped:
-                        if byte == CommandBytes.ESCAPE.value:
-                            is_escaped = True
-                        else:
-                            addr_bytes.append(byte)
-                    elif is_escaped:
-                        if byte == CommandBytes.BREAK.value:
-                            return None
-                        elif byte == CommandBytes.WRITE.value:
-                            return self.__parse_write_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.READ.value:
-                            return self.__parse_read_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.ESCAPE.value:
-                            addr_bytes.append(byte)
-                            is_escaped = False
-
-            elif len(data_bytes) < num_data_bytes:
-                if len(data_bytes) == 0:
-                    if not is_escaped:
-                        if byte == CommandBytes.ESCAPE.value:
-                            is_escaped = True
-                        else:
-                            data_bytes.append(byte)
-                    elif is_escaped:
-                        if byte == CommandBytes.BREAK.value:
-                            return None
-                        elif byte == CommandBytes.WRITE.value:
-                            return self.__parse_write_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.READ.value:
-                            return self.__parse_read_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.ESCAPE.value:
-                            data_bytes.append(byte)
-                            is_escaped = False
+        end = len(bytestream)
+        while pos < end and num_parsed < num_cmd_bytes:
+            byte = bytestream[pos]
+            pos += 1
+            if not is_escaped:
+                if byte == _ESCAPE:
+                    is_escaped = True
                 else:
-                    if not is_escaped:
-                        if byte == CommandBytes.ESCAPE.value:
-                            is_escaped = True
-                        else:
-                            data_bytes.append(byte)
-                    elif is_escaped:
-                        if byte == CommandBytes.BREAK.value:
-                            return None
-                        elif byte == CommandBytes.WRITE.value:
-                            return self.__parse_write_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.READ.value:
-                            return self.__parse_read_bytestream(
-                                wr_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.ESCAPE.value:
-                            data_bytes.append(byte)
-                            is_escaped = False
-
-        # Convert into an unsigned integer address and data then write to RAM
-        addr_bits = "".join(f"{byte:08b}" for byte in bytearray(addr_bytes))
-        data_bits = "".join(f"{byte:08b}" for byte in bytearray(data_bytes))
-        addr = LogicArray(addr_bits)[self.addr_w - 1 : 0].integer
-        data = LogicArray(data_bits).integer
-        self.mem_model.write(addr, data)
-        return None
-
-    def __parse_read_bytestream(self, rd_bytestream: List[int]) -> List[int]:
-        """Parse a read command bytestream to read from RAM. Returns the read
-        response bytestream if a successful read is completed.
+                    cmd_bytes[num_parsed] = byte
+                    num_parsed += 1
+            else:
+                action = _ESCAPED_ACTIONS[byte]
+                if action == _ESCAPED_LITERAL:
+                    cmd_bytes[num_parsed] = byte
+                    num_parsed += 1
+                    is_escaped = False
+                elif action == _ESCAPED_COMMAND:
+                    command = byte
+                    num_cmd_bytes = self._num_cmd_bytes[command]
+                    num_parsed = 0
+                    is_escaped = False
+                elif action == _ESCAPED_BREAK:
+                    return None
+
+        # Convert into an unsigned integer address and data then write to or read from RAM
+        addr_bytes = cmd_bytes[: min(num_parsed, num_addr_bytes)]
+        addr = int.from_bytes(addr_bytes, "big") & self._addr_mask
+        if command == _WRITE:
+            data = int.from_bytes(cmd_bytes[num_addr_bytes:num_parsed], "big")
+            self.mem_model.write(addr, data)
+            return None
+
+        read_data = self.mem_model.read_int(addr)
+        if read_data is None:
+            return _BREAK_BYTES
+        return read_data.to_bytes(self._num_data_bytes, "big")
+
+    def __parse_bytestream(self, bytestream: bytearray) -> Optional[bytes]:
+        """Parse the bytestream for WRITE or READ commands.
 
         Args:
-            rd_bytestream (List[int]): List of read command bytes.
+            bytestream (bytearray): Command bytestream.
 
         Returns:
-            List[int]: Read response bytestream.
+            Optional[bytes]: Read response bytestream.
         """
-        addr_bytes = []
-        num_addr_bytes = 4
-        num_data_bytes = math.ceil(self.data_w / self.byte_w)
-        is_escaped = False
-        for idx, byte in enumerate(rd_bytestream):
-            if len(addr_bytes) < num_addr_bytes:
-                if len(addr_bytes) == 0:
-                    if not is_escaped:
-                        if byte == CommandBytes.ESCAPE.value:
-                            is_escaped = True
-                        else:
-                            addr_bytes.append(byte)
-                    elif is_escaped:
-                        if byte == CommandBytes.BREAK.value:
-                            return None
-                        elif byte == CommandBytes.WRITE.value:
-                            return self.__parse_write_bytestream(
-                                rd_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.READ.value:
-                            return self.__parse_read_bytestream(
-                                rd_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.ESCAPE.value:
-                            addr_bytes.append(byte)
-                            is_escaped = False
-                else:
-                    if not is_escaped:
-                        if byte == CommandBytes.ESCAPE.value:
-                            is_escaped = True
-                        else:
-                            addr_bytes.append(byte)
-                    elif is_escaped:
-                        if byte == CommandBytes.BREAK.value:
-                            return None
-                        elif byte == CommandBytes.WRITE.value:
-                            return self.__parse_write_bytestream(
-                                rd_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.READ.value:
-                            return self.__parse_read_bytestream(
-                                rd_bytestream[idx + 1 :]
-                            )
-                        elif byte == CommandBytes.ESCAPE.value:
-                            addr_bytes.append(byte)
-                            is_escaped = False
-
-        # Convert into an unsigned integer address and data then read from RAM
-        addr_bits = "".join(f"{byte:08b}" for byte in bytearray(addr_bytes))
-        addr = LogicArray(addr_bits)[self.addr_w - 1 : 0].integer
-        read_logicarray = self.mem_model.read(addr)
-        read_bytes = []
-        if read_logicarray:
-            for idx in range(num_data_bytes):
-                read_bytes.append(
-                    read_logicarray[
-                        (idx + 1) * self.byte_w - 1 : idx * self.byte_w
-                    ].integer
-                )
-            read_bytes.reverse()
-        else:
-            read_bytes.append(CommandBytes.BREAK.value)
-        return read_bytes
+        assert bytestream[0] == _ESCAPE
+        for idx in range(1, len(bytestream)):
+            byte = bytestream[idx]
+            if byte == _WRITE or byte == _READ:
+                return self.__parse_command_bytestream(bytestream, idx + 1, byte)
 
-    def __parse_bytestream(self, bytestream: List[int]) -> List[int]:
-        """Parse the bytestream for WRITE or READ commands.
+        return None
+
+    def __build_read_bytestream(self, response: bytes) -> bytearray:
+        """Build the read bytestream the DUT outputs for a read response.
 
         Args:
-            bytestream (List[int]): List of bytes.
+            response (bytes): Read data, or a single BREAK byte for an invalid read.
 
         Returns:
-            List[int]: Read response bytestream.
+            bytearray: Read bytestream, starting with an ESCAPE byte.
         """
-        for idx, byte in enumerate(bytestream):
-            if idx == 0:
-                assert byte == CommandBytes.ESCAPE.value
-            else:
-                if byte == CommandBytes.WRITE.value:
-                    write_cmd = True
-                    return self.__parse_write_bytestream(bytestream[idx + 1 :])
-                elif byte == CommandBytes.READ.value:
-                    return self.__parse_read_bytestream(bytestream[idx + 1 :])
-
-        return None
+        read_bytestream = bytearray((_ESCAPE,))
+        if len(response) > 1:
+            read_bytestream.append(_READ_DATA)
+            # Every ESCAPE byte in the read data is escaped by doubling it
+            if _ESCAPE_BYTES in response:
+                response = response.replace(_ESCAPE_BYTES, _ESCAPED_ESCAPE_BYTES)
+            read_bytestream += response
+        else:
+            read_bytestream.append(response[0])
+        return read_bytestream
 
     def __update_read_bytestreams(self) -> None:
         """Iterates over all command bytestreams and generates the corresponding
         read bytestream response."""
-        read_bytestreams: List[List[int]] = []
-        for command_bytestream in self.command_bytestreams:
-            response = self.__parse_bytestream(command_bytestream)
-            if response:
-                read_bytestreams.append([CommandBytes.ESCAPE.value])
-                if len(response) > 1:
-                    read_bytestreams[-1].append(CommandBytes.READ_DATA.value)
-                    for byte in response:
-                        read_bytestreams[-1].append(byte)
-                        if byte == CommandBytes.ESCAPE.value:
-                            read_bytestreams[-1].append(byte)
-                else:
-                    read_bytestreams[-1].append(response[0])
-
-        self.read_bytestreams = read_bytestreams
+        parse_bytestream = self.__parse_bytestream
+        responses = (parse_bytestream(command_bytestream) for command_bytestream in self.command_bytestreams)
+        self.read_bytestreams = [self.__build_read_bytestream(response) for response in responses if response]
 
     def update_bytestreams(self, num_cmds: int) -> None:
         """Updates the command bytestream and the read bytestream.
@@ -1,13 +1,43 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.types import LogicArray, Range
-from cocotb.triggers import RisingEdge, FallingEdge
+from cocotb.triggers import ClockCycles, Combine, RisingEdge, FallingEdge, SimTimeoutError, with_timeout
+import os
 import random
-import math
-from typing import List, Sequence
+from typing import Sequence, Tuple
 
 from register_fsm_model import RegisterFsmModel
 
+_CLK_PERIOD_NS = 1
+# Clock cycles to wait for the next data out valid before failing the test.
+_TIMEOUT_CYCLES = 2048
+# Check the FSM is idle after every driven command. Set TB_FULL_ASSERTS=0 to skip the check.
+_FULL_ASSERTS = os.environ.get("TB_FULL_ASSERTS", "1") != "0"
+
+# Directed commands and the read responses they are expected to produce.
+_SIMPLE_CMDS: Tuple[bytes, ...] = (
+    bytes((0xE7, 0x13, 0x00, 0x00, 0x00, 0x03)),
+    bytes((0xE7, 0x13, 0x00, 0x00, 0x00, 0xE7, 0xE7)),
+    bytes((0xE7, 0x23, 0x00, 0x00, 0x00, 0x02, 0xAA, 0xE7, 0xE7, 0x55, 0xAA, 0xE7, 0x13, 0x00, 0x00, 0x00, 0x02)),
+    bytes((0xE7, 0x23, 0x00, 0x00, 0x00, 0x01, 0xAA, 0xE7, 0x55, 0xE7, 0x13, 0x00, 0x00, 0x00, 0x01)),
+)
+
+_SIMPLE_SEQUENCES: Tuple[bytes, ...] = (
+    bytes((0xE7, 0x03, 0x10, 0x20, 0x30, 0x40)),
+    bytes((0xE7, 0x03, 0xDE, 0xAD, 0xBE, 0xEF)),
+    bytes((0xE7, 0x03, 0xAA, 0xE7, 0xE7, 0x55, 0xAA)),
+    bytes((0xE7, 0x03, 0x89, 0xAB, 0xCD, 0xE7, 0xE7)),
+)
+
+# The random valid test also writes and reads back data made up of ESCAPE bytes.
+_RANDOM_VLDS_CMDS: Tuple[bytes, ...] = _SIMPLE_CMDS + (
+    bytes((0xE7, 0x23, 0x00, 0x00, 0x00, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7)),
+    bytes((0xE7, 0x13, 0x00, 0x00, 0x00, 0xE7, 0xE7)),
+)
+
+_RANDOM_VLDS_SEQUENCES: Tuple[bytes, ...] = _SIMPLE_SEQUENCES + (
+    bytes((0xE7, 0x03, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7)),
+)
+
 
 async def reset_dut(dut, num_clock_cycles: int) -> None:
     """Reset the DUT for a number of clock cycles
@@ -19,84 +49,120 @@ async def reset_dut(dut, num_clock_cycles: int) -> None:
     dut.data_in.value = 0
     dut.data_in_vld.value = 0
 
-    for _ in range(num_clock_cycles):
-        await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, num_clock_cycles)
 
     dut.reset.value = 0
 
 
-async def drive_cmds(dut, cmds: List[Sequence[int]]) -> None:
+async def bringup_dut(dut) -> None:
+    """Start the DUT clock, then hold the DUT in reset for a random number of clock cycles."""
+    cocotb.start_soon(Clock(dut.clk, _CLK_PERIOD_NS, "ns").start())
+    await reset_dut(dut, random.randint(1, 10))
+    await RisingEdge(dut.clk)
+
+
+async def drive_cmds(dut, cmds: Sequence[Sequence[int]]) -> None:
     """Drive commands bytestreams into the DUT. Waits 8 clock cycles between commands
     before sending the next to give the DUT time to perform reads.
 
     Args:
-        cmds (List[Sequence[int]]): List of commands bytestreams to drive DUT.
+        cmds (Sequence[Sequence[int]]): List of commands bytestreams to drive DUT.
     """
+    clk = dut.clk
+    data_in = dut.data_in
+    data_in_vld = dut.data_in_vld
+    reg_fsm = dut.u_fsm.reg_fsm
+    rising_edge = RisingEdge(clk)
+    falling_edge = FallingEdge(clk)
     for cmd in cmds:
+        data_in_vld.value = 1
         for byte in cmd:
-            dut.data_in.value = byte
-            dut.data_in_vld.value = 1
-            await RisingEdge(dut.clk)
+            data_in.value = byte
+            await rising_edge
 
-        dut.data_in_vld.value = 0
-        await FallingEdge(dut.clk)
-        assert dut.u_fsm.reg_fsm.value == 0
-        for _ in range(8):
-            await RisingEdge(dut.clk)
+        data_in_vld.value = 0
+        if _FULL_ASSERTS:
+            await falling_edge
+            assert reg_fsm.value == 0
+        await ClockCycles(clk, 8)
 
-    dut.data_in_vld.value = 0
+    data_in_vld.value = 0
 
 
-async def drive_cmds_random_vlds(dut, cmds: List[Sequence[int]]) -> None:
+async def drive_cmds_random_vlds(dut, cmds: Sequence[Sequence[int]]) -> None:
     """Drive commands bytestreams into the DUT. Waits 8 clock cycles between commands
     before sending the next to give the DUT time to perform reads. Data valid
     is set high randomly. Data is held until data valid is set.
 
     Args:
-        cmds (List[Sequence[int]]): List of commands bytestreams to drive DUT.
+        cmds (Sequence[Sequence[int]]): List of commands bytestreams to drive DUT.
     """
+    clk = dut.clk
+    data_in = dut.data_in
+    data_in_vld = dut.data_in_vld
+    rising_edge = RisingEdge(clk)
+    vld = 0
+    data_in_vld.value = vld
+    # Coin flips for data valid, drawn 64 at a time
+    vld_bits = 0
+    num_vld_bits = 0
     for cmd in cmds:
         byte_idx = 0
         while byte_idx < len(cmd):
-            if random.randint(0, 1):
-                dut.data_in.value = cmd[byte_idx]
-                dut.data_in_vld.value = 1
+            if not num_vld_bits:
+                vld_bits = random.getrandbits(64)
+                num_vld_bits = 64
+            num_vld_bits -= 1
+            take = vld_bits & 1
+            vld_bits >>= 1
+            if take:
+                data_in.value = cmd[byte_idx]
+                if not vld:
+                    vld = 1
+                    data_in_vld.value = vld
                 byte_idx += 1
-            else:
-                dut.data_in_vld.value = 0
-            await RisingEdge(dut.clk)
-        for _ in range(8):
-            await RisingEdge(dut.clk)
+            elif vld:
+                vld = 0
+                data_in_vld.value = vld
+            await rising_edge
+        await ClockCycles(clk, 8)
 
-    dut.data_in_vld.value = 0
+    data_in_vld.value = 0
 
 
-async def verify_sequences(dut, sequences: List[Sequence[int]]) -> None:
+async def verify_sequences(dut, sequences: Sequence[Sequence[int]]) -> None:
     """Monitor the DUT outputs and verify read response bytestreams on every data out valid.
 
     Args:
-        sequences (List[Sequence[int]]): List of read response bytestreams.
+        sequences (Sequence[Sequence[int]]): List of read response bytestreams.
     """
-    timeout = 0
+    clk = dut.clk
+    data_out_vld = dut.data_out_vld
+    data_out = dut.data_out
+    falling_edge = FallingEdge(clk)
+    vld_rising_edge = RisingEdge(data_out_vld)
+    num_sequences = len(sequences)
+    # Built from the last milestone down so the earliest one wins when indices collide
+    milestones = {
+        -(-3 * num_sequences // 4): "75%",
+        -(-num_sequences // 2): "50%",
+        -(-num_sequences // 4): "25%",
+    }
     for seq_idx, sequence in enumerate(sequences):
-        byte_count = 0
-        if seq_idx == math.ceil(len(sequences) * 0.25):
-            cocotb.log.info("Verified 25% sequences.")
-        elif seq_idx == math.ceil(len(sequences) * 0.5):
-            cocotb.log.info("Verified 50% sequences.")
-        elif seq_idx == math.ceil(len(sequences) * 0.75):
-            cocotb.log.info("Verified 75% sequences.")
-        while byte_count < len(sequence):
-            timeout += 1
-            await FallingEdge(dut.clk)
-            if dut.data_out_vld.value:
-                assert (
-                    sequence[byte_count] == dut.data_out.value.integer
-                ), f"Expecting: {sequence[byte_count]}. Got: {dut.data_out.value.integer}"
-                timeout = 0
-                byte_count += 1
-
-            assert timeout < 2048, f"Timeout while validating sequence #{seq_idx}."
+        milestone = milestones.get(seq_idx)
+        if milestone:
+            cocotb.log.info(f"Verified {milestone} sequences.")
+        for expected in sequence:
+            await falling_edge
+            # Sleep until the DUT raises data out valid rather than sampling every clock cycle
+            while not data_out_vld.value:
+                try:
+                    await with_timeout(vld_rising_edge, _TIMEOUT_CYCLES * _CLK_PERIOD_NS, "ns")
+                except SimTimeoutError:
+                    raise AssertionError(f"Timeout while validating sequence #{seq_idx}.") from None
+                await falling_edge
+            data = data_out.value.to_unsigned()
+            assert expected == data, f"Expecting: {expected}. Got: {data}"
 
     cocotb.log.info(f"Verified {len(sequences)} sequences.")
 
@@ -104,64 +170,23 @@ async def verify_sequences(dut, sequences: List[Sequence[int]]) -> None:
 @cocotb.test()
 async def test_simple_cases(dut):
     """Drives commands in and verifies against expected sequence."""
-    cocotb.start_soon(Clock(dut.clk, 1, "ns").start())
-    await reset_dut(dut, random.randint(1, 10))
-    await RisingEdge(dut.clk)
+    await bringup_dut(dut)
 
-    cmds: List[bytearray] = [
-        bytearray([0xE7, 0x13, 0x00, 0x00, 0x00, 0x03]),
-        bytearray([0xE7, 0x13, 0x00, 0x00, 0x00, 0xE7, 0xE7]),
-        bytearray(
-            [0xE7, 0x23, 0x00, 0x00, 0x00, 0x02, 0xAA, 0xE7, 0xE7, 0x55, 0xAA, 0xE7, 0x13, 0x00, 0x00, 0x00, 0x02]
-        ),
-        bytearray([0xE7, 0x23, 0x00, 0x00, 0x00, 0x01, 0xAA, 0xE7, 0x55, 0xE7, 0x13, 0x00, 0x00, 0x00, 0x01]),
-    ]
+    drive_task = cocotb.start_soon(drive_cmds(dut, _SIMPLE_CMDS))
+    verify_task = cocotb.start_soon(verify_sequences(dut, _SIMPLE_SEQUENCES))
 
-    sequences: List[bytearray] = [
-        bytearray([0xE7, 0x03, 0x10, 0x20, 0x30, 0x40]),
-        bytearray([0xE7, 0x03, 0xDE, 0xAD, 0xBE, 0xEF]),
-        bytearray([0xE7, 0x03, 0xAA, 0xE7, 0xE7, 0x55, 0xAA]),
-        bytearray([0xE7, 0x03, 0x89, 0xAB, 0xCD, 0xE7, 0xE7]),
-    ]
-
-    drive_task = cocotb.start_soon(drive_cmds(dut, cmds))
-    verify_task = cocotb.start_soon(verify_sequences(dut, sequences))
-
-    while not verify_task.done():
-        await RisingEdge(dut.clk)
+    await Combine(drive_task.complete, verify_task.complete)
 
 
 @cocotb.test()
 async def test_simple_random_vlds(dut):
     """Drives commands in at random times and verifies against expected sequence."""
-    cocotb.start_soon(Clock(dut.clk, 1, "ns").start())
-    await reset_dut(dut, random.randint(1, 10))
-    await RisingEdge(dut.clk)
+    await bringup_dut(dut)
 
-    cmds: List[bytearray] = [
-        bytearray([0xE7, 0x13, 0x00, 0x00, 0x00, 0x03]),
-        bytearray([0xE7, 0x13, 0x00, 0x00, 0x00, 0xE7, 0xE7]),
-        bytearray(
-            [0xE7, 0x23, 0x00, 0x00, 0x00, 0x02, 0xAA, 0xE7, 0xE7, 0x55, 0xAA, 0xE7, 0x13, 0x00, 0x00, 0x00, 0x02]
-        ),
-        bytearray([0xE7, 0x23, 0x00, 0x00, 0x00, 0x01, 0xAA, 0xE7, 0x55, 0xE7, 0x13, 0x00, 0x00, 0x00, 0x01]),
-        bytearray([0xE7, 0x23, 0x00, 0x00, 0x00, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7]),
-        bytearray([0xE7, 0x13, 0x00, 0x00, 0x00, 0xE7, 0xE7]),
-    ]
+    drive_task = cocotb.start_soon(drive_cmds_random_vlds(dut, _RANDOM_VLDS_CMDS))
+    verify_task = cocotb.start_soon(verify_sequences(dut, _RANDOM_VLDS_SEQUENCES))
 
-    sequences: List[bytearray] = [
-        bytearray([0xE7, 0x03, 0x10, 0x20, 0x30, 0x40]),
-        bytearray([0xE7, 0x03, 0xDE, 0xAD, 0xBE, 0xEF]),
-        bytearray([0xE7, 0x03, 0xAA, 0xE7, 0xE7, 0x55, 0xAA]),
-        bytearray([0xE7, 0x03, 0x89, 0xAB, 0xCD, 0xE7, 0xE7]),
-        bytearray([0xE7, 0x03, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7, 0xE7]),
-    ]
-
-    drive_task = cocotb.start_soon(drive_cmds_random_vlds(dut, cmds))
-    verify_task = cocotb.start_soon(verify_sequences(dut, sequences))
-
-    while not verify_task.done():
-        await RisingEdge(dut.clk)
+    await Combine(drive_task.complete, verify_task.complete)
 
 
 @cocotb.test()
@@ -169,9 +194,7 @@ async def test_scoreboard_vs_model(dut):
     """Using a model, generate 65,536 commands and the expected DUT outputs.
     Drive 65,536 commands into the DUT and check if all outputs are as expected.
     """
-    cocotb.start_soon(Clock(dut.clk, 1, "ns").start())
-    await reset_dut(dut, random.randint(1, 10))
-    await RisingEdge(dut.clk)
+    await bringup_dut(dut)
 
     data_w = dut.u_fsm.DATA_W.value
     addr_w = dut.u_fsm.ADDR_W.value
@@ -185,5 +208,4 @@ async def test_scoreboard_vs_model(dut):
     verify_task = cocotb.start_soon(verify_sequences(dut, model.read_bytestreams))
 
     cocotb.log.info("Start verification...")
-    while not verify_task.done() or not drive_task.done():
-        await RisingEdge(dut.clk)
+    await Combine(drive_task.complete, verify_task.complete)